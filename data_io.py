@@ -0,0 +1,159 @@
+"""
+Data file I/O shared by the Dredge App and the Dual Data Viewer
+
+Reading and parsing the USBL/sensor CSVs, the WGS84 -> UTM transformer, and
+writing exports. No widgets here: the QObject workers only run these helpers
+on a background QThread and report back through signals.
+"""
+
+import gzip
+from functools import lru_cache
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from pyqtgraph.Qt import QtCore
+from pandas.tseries.api import guess_datetime_format
+from pyproj import Transformer
+
+# Exports are written (and report progress) this many rows at a time
+EXPORT_CHUNK_ROWS = 100_000
+
+
+@lru_cache(maxsize=8)
+def utm_transformer(utm_zone, hemisphere):
+    """WGS84 -> UTM transformer for a zone, built once and reused across loads"""
+    return Transformer.from_crs(
+        "EPSG:4326",  # WGS84
+        f"EPSG:326{utm_zone:02d}" if hemisphere == 'north' else f"EPSG:327{utm_zone:02d}",
+        always_xy=True
+    )
+
+
+def parse_datetime_column(values):
+    """Parse a datetime column to UTC using the format of its first value
+    
+    A single explicit format takes pandas' vectorized parser; 'mixed' (per-row
+    format inference) is only used when no one format fits every row.
+    """
+    non_null = values.dropna()
+    fmt = guess_datetime_format(str(non_null.iloc[0])) if len(non_null) else None
+    if fmt is not None:
+        try:
+            return pd.to_datetime(values, format=fmt, utc=True)
+        except (ValueError, TypeError):
+            pass
+    return pd.to_datetime(values, format='mixed', utc=True)
+
+
+def read_usbl_csv(filename):
+    """Read a USBL CSV file with its datetime column parsed to UTC"""
+    # Multithreaded Arrow parser
+    usbl_df = pd.read_csv(filename, engine='pyarrow')
+    usbl_df['datetime'] = parse_datetime_column(usbl_df['datetime'])
+    return usbl_df
+
+
+def read_sensor_csv(filename):
+    """Read a sensor CSV file (after any leading '#' lines) with datetimes parsed to UTC"""
+    # Count the leading '#' comment lines, reading only as far as the
+    # header (the pyarrow engine has no comment= option)
+    data_start = 0
+    with open(filename, 'r') as f:
+        for line in f:
+            if not line.startswith('#'):
+                break
+            data_start += 1
+    
+    # header= rather than skiprows=: the pyarrow engine ignores skiprows
+    # when a header row is given
+    sensor_df = pd.read_csv(filename, header=data_start, engine='pyarrow')
+    
+    # Naive timestamps are taken to be UTC; falls back to mixed format to
+    # handle inconsistent microseconds
+    sensor_df['datetime'] = parse_datetime_column(sensor_df['datetime'])
+    return sensor_df
+
+
+def write_export_table(table, path, export_format, progress=None, gzip_level=None):
+    """Write an Arrow table as CSV or Parquet, EXPORT_CHUNK_ROWS rows at a time
+    
+    progress, if given, is called with the number of rows written so far.
+    gzip_level, if given, gzips CSV output at that level.
+    """
+    sink = path
+    try:
+        # Writer (and gzip stream) are opened inside the try so the gzip
+        # handle is closed even if the writer cannot be created
+        if export_format == "Parquet":
+            # Columnar + zstd level 1: fastest zstd level, still far smaller than CSV
+            writer = pq.ParquetWriter(path, table.schema, compression='zstd', compression_level=1)
+        else:
+            # Annotation flags are written as 1/0 rather than true/false
+            for i, field in enumerate(table.schema):
+                if pa.types.is_boolean(field.type):
+                    table = table.set_column(i, field.name, table.column(i).cast(pa.uint8()))
+            if gzip_level is not None:
+                # Level 1 is several times faster than gzip's usual default of 6
+                # for a slightly larger file; mtime=0 keeps output reproducible
+                sink = gzip.GzipFile(path, 'wb', compresslevel=gzip_level, mtime=0)
+            # Arrow's multi-threaded C++ writer instead of pandas' per-cell formatting
+            writer = pacsv.CSVWriter(sink, table.schema)
+        
+        written = 0
+        with writer:
+            for batch in table.to_batches(max_chunksize=EXPORT_CHUNK_ROWS):
+                writer.write_batch(batch)
+                written += batch.num_rows
+                if progress is not None:
+                    progress(written)
+    finally:
+        if sink is not path:
+            sink.close()
+
+
+class LoadWorker(QtCore.QObject):
+    """Reads a data file on a background thread so the window stays responsive"""
+    loaded = QtCore.Signal(object)  # The DataFrame returned by read
+    failed = QtCore.Signal(str)
+    
+    def __init__(self, read, filename):
+        super().__init__()
+        self.read = read  # read_usbl_csv or read_sensor_csv
+        self.filename = filename
+        
+    def run(self):
+        try:
+            df = self.read(self.filename)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.loaded.emit(df)
+
+
+class ExportWorker(QtCore.QObject):
+    """Writes export tables on a background thread so the window stays responsive"""
+    progress = QtCore.Signal(int)  # Rows written so far, across all tables
+    finished = QtCore.Signal()
+    failed = QtCore.Signal(str)
+    
+    def __init__(self, jobs, export_format, gzip_level=None):
+        super().__init__()
+        self.jobs = jobs  # [(pyarrow.Table, path), ...]
+        self.export_format = export_format
+        self.gzip_level = gzip_level
+        
+    def run(self):
+        done = 0
+        try:
+            for table, path in self.jobs:
+                write_export_table(
+                    table, path, self.export_format,
+                    lambda rows, base=done: self.progress.emit(base + rows),
+                    self.gzip_level
+                )
+                done += table.num_rows
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished.emit()
@@ -2,10 +2,100 @@
 Debug script to check UTM conversion for USBL data
 Usage: python debug_utm.py path/to/usbl.csv
 """
+import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pacsv
 from pyproj import Transformer
 
+PARALLEL_MIN_ROWS = 100_000  # below this, thread overhead beats the speedup
+BLOCK_SIZE = 64 << 20  # bytes of CSV per streamed record batch
+
+
+@lru_cache(maxsize=32)
+def _get_transformer(src, dst):
+    """Build (once) and reuse the PROJ pipeline for a CRS pair"""
+    return Transformer.from_crs(src, dst, always_xy=True)
+
+
+# Transformers are not thread-safe, so each worker thread keeps its own
+_thread_local = threading.local()
+
+
+def _thread_transformer(src, dst):
+    """Per-thread transformer for the worker pool"""
+    cache = getattr(_thread_local, 'transformers', None)
+    if cache is None:
+        cache = _thread_local.transformers = {}
+    if (src, dst) not in cache:
+        cache[(src, dst)] = Transformer.from_crs(src, dst, always_xy=True)
+    return cache[(src, dst)]
+
+
+def transform_parallel(src, dst, lon, lat):
+    """Transform lon/lat into a (2, n) easting/northing buffer, in place
+
+    Large inputs are split into chunks on a thread pool (PROJ releases the GIL);
+    each worker writes straight into its slice of the shared buffer.
+    """
+    n = len(lon)
+    en = np.empty((2, n), dtype=np.float64)
+    en[0] = lon
+    en[1] = lat
+
+    workers = os.cpu_count() or 1
+    if n < PARALLEL_MIN_ROWS or workers == 1:
+        # Thread overhead dominates on small inputs
+        _get_transformer(src, dst).transform(
+            en[0], en[1], radians=False, errcheck=False, inplace=True
+        )
+        return en
+
+    bounds = np.linspace(0, n, workers + 1, dtype=np.int64)
+
+    def _chunk_transform(lo, hi):
+        _thread_transformer(src, dst).transform(
+            en[0, lo:hi], en[1, lo:hi], radians=False, errcheck=False, inplace=True
+        )
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_chunk_transform, bounds[:-1], bounds[1:]))
+
+    return en
+
+
+def _beacon_stats(names, easting, northing):
+    """Yield (beacon, count, e_min, e_max, n_min, n_max) for one batch
+
+    np.unique factorizes the names; after a stable sort by code every beacon's
+    min/max comes out of a single ufunc reduceat over the group starts.
+    """
+    keep = pd.notna(names)
+    names, easting, northing = names[keep], easting[keep], northing[keep]
+    if len(names) == 0:
+        return
+
+    beacons, inverse = np.unique(names, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(inverse[order])) + 1))
+    e_sorted = easting[order]
+    n_sorted = northing[order]
+
+    yield from zip(
+        beacons,
+        np.bincount(inverse).tolist(),
+        np.minimum.reduceat(e_sorted, starts),
+        np.maximum.reduceat(e_sorted, starts),
+        np.minimum.reduceat(n_sorted, starts),
+        np.maximum.reduceat(n_sorted, starts),
+    )
+
+
 if len(sys.argv) < 2:
     print("Usage: python debug_utm.py path/to/usbl.csv")
     sys.exit(1)
@@ -16,71 +106,147 @@ print("=" * 60)
 print("USBL UTM CONVERSION DEBUG")
 print("=" * 60)
 
-# Load data
-df = pd.read_csv(filename)
-print(f"\n✓ Loaded {len(df)} rows")
-print(f"  Columns: {list(df.columns)}")
+# Probe the header so we only parse the columns we actually use
+columns = pacsv.open_csv(filename).schema.names
 
 # Check for required columns
-if 'longitude_deg' not in df.columns or 'latitude_deg' not in df.columns:
+if 'longitude_deg' not in columns or 'latitude_deg' not in columns:
     print("\n✗ ERROR: Missing longitude_deg or latitude_deg columns!")
     sys.exit(1)
 
-# Get first point
-lon = df['longitude_deg'].iloc[0]
-lat = df['latitude_deg'].iloc[0]
-
-print(f"\n📍 First point (lat/lon):")
-print(f"   Latitude:  {lat:.8f}°")
-print(f"   Longitude: {lon:.8f}°")
-
-# Calculate UTM zone
-utm_zone = int((lon + 180) / 6) + 1
-hemisphere = 'north' if lat >= 0 else 'south'
-
-print(f"\n🌍 UTM Zone: {utm_zone}{hemisphere[0].upper()}")
-
-# Create transformer
-epsg_code = f"326{utm_zone:02d}" if hemisphere == 'north' else f"327{utm_zone:02d}"
-print(f"   EPSG Code: {epsg_code}")
-
-transformer = Transformer.from_crs(
-    "EPSG:4326",  # WGS84
-    f"EPSG:{epsg_code}",
-    always_xy=True
+usecols = ['longitude_deg', 'latitude_deg']
+has_beacons = 'beacon_name' in columns
+if has_beacons:
+    usecols.append('beacon_name')
+
+print(f"\n✓ Streaming {filename}")
+print(f"  Columns: {columns if len(columns) < 50 else f'{len(columns)} columns'}")
+
+# Stream the file in record batches so peak memory is O(batch), not O(file)
+reader = pacsv.open_csv(
+    filename,
+    read_options=pacsv.ReadOptions(block_size=BLOCK_SIZE),
+    # Types are pinned because streaming infers them from the first block only:
+    # an all-empty column there would be typed null and fail on the first value.
+    # strings_can_be_null: an empty beacon_name reads as null (and is skipped
+    # in the beacon stats) rather than as a "" beacon
+    convert_options=pacsv.ConvertOptions(
+        include_columns=usecols,
+        column_types={
+            'longitude_deg': pa.float64(),
+            'latitude_deg': pa.float64(),
+            'beacon_name': pa.string(),
+        },
+        strings_can_be_null=True,
+    )
 )
 
-# Transform all points
-print(f"\n⚙️  Converting all {len(df)} points...")
-easting, northing = transformer.transform(
-    df['longitude_deg'].values,
-    df['latitude_deg'].values
-)
+n_rows = 0
+n_skipped = 0
+e_min = n_min = np.inf
+e_max = n_max = -np.inf
+beacon_stats = {}  # beacon -> [count, e_min, e_max, n_min, n_max]
+head = None
+src_crs = dst_crs = None
+
+for batch in reader:
+    if batch.num_rows == 0:
+        continue
+
+    # Plain C-contiguous float64 buffers (not Arrow arrays) for numpy and PROJ
+    lon_arr = np.ascontiguousarray(
+        batch.column('longitude_deg').to_numpy(zero_copy_only=False), dtype=np.float64
+    )
+    lat_arr = np.ascontiguousarray(
+        batch.column('latitude_deg').to_numpy(zero_copy_only=False), dtype=np.float64
+    )
+
+    # Drop missing/non-finite positions once here, so PROJ output is finite
+    # and the reductions below can use plain min/max instead of nanmin/nanmax
+    finite = np.isfinite(lon_arr) & np.isfinite(lat_arr)
+    if not finite.all():
+        n_skipped += int((~finite).sum())
+        batch = batch.filter(pa.array(finite))
+        lon_arr, lat_arr = lon_arr[finite], lat_arr[finite]
+        if batch.num_rows == 0:
+            continue
+
+    if src_crs is None:
+        # Get first point
+        print(f"\n📍 First point (lat/lon):")
+        print(f"   Latitude:  {lat_arr[0]:.8f}°")
+        print(f"   Longitude: {lon_arr[0]:.8f}°")
+
+        # Calculate UTM zone from the most common zone in the first batch, so a
+        # track starting near a zone boundary doesn't pick the wrong one
+        zones = ((lon_arr + 180.0) // 6.0).astype(np.int16) + 1
+        utm_zone = int(np.bincount(zones - zones.min()).argmax() + zones.min())
+        hemisphere = 'north' if (lat_arr >= 0).mean() >= 0.5 else 'south'
+
+        print(f"\n🌍 UTM Zone: {utm_zone}{hemisphere[0].upper()}")
+
+        # Create transformer
+        epsg_code = f"326{utm_zone:02d}" if hemisphere == 'north' else f"327{utm_zone:02d}"
+        print(f"   EPSG Code: {epsg_code}")
+
+        src_crs, dst_crs = "EPSG:4326", f"EPSG:{epsg_code}"  # WGS84 -> UTM
+        print(f"\n⚙️  Converting points in {BLOCK_SIZE >> 20} MB batches...")
+
+    en = transform_parallel(src_crs, dst_crs, lon_arr, lat_arr)
+    easting, northing = en
+
+    # Running statistics: one min and one max sweep over the (2, n) buffer
+    # cover both coordinates
+    batch_min, batch_max = en.min(axis=1), en.max(axis=1)
+    e_min, e_max = min(e_min, batch_min[0]), max(e_max, batch_max[0])
+    n_min, n_max = min(n_min, batch_min[1]), max(n_max, batch_max[1])
+
+    if has_beacons:
+        names = batch.column('beacon_name').to_numpy(zero_copy_only=False)
+        for beacon, count, b_e_min, b_e_max, b_n_min, b_n_max in _beacon_stats(
+                names, easting, northing):
+            acc = beacon_stats.get(beacon)
+            if acc is None:
+                beacon_stats[beacon] = [count, b_e_min, b_e_max, b_n_min, b_n_max]
+            else:
+                acc[0] += count
+                acc[1], acc[2] = min(acc[1], b_e_min), max(acc[2], b_e_max)
+                acc[3], acc[4] = min(acc[3], b_n_min), max(acc[4], b_n_max)
+
+    if head is None:
+        head = batch.slice(0, 5).to_pandas().assign(
+            easting=easting[:5], northing=northing[:5]
+        )
+
+    n_rows += batch.num_rows
+
+if n_rows == 0:
+    print("\n✗ ERROR: No data rows found!")
+    sys.exit(1)
 
-# Add to dataframe
-df['easting'] = easting
-df['northing'] = northing
+print(f"\n✓ Converted {n_rows} rows")
+if n_skipped:
+    print(f"  Skipped {n_skipped} rows with missing/non-finite lat/lon")
 
 # Show statistics
 print(f"\n📊 UTM Coordinates (meters):")
-print(f"   Easting:  {df['easting'].min():.2f} to {df['easting'].max():.2f}")
-print(f"   Range:    {df['easting'].max() - df['easting'].min():.2f} m")
-print(f"   Northing: {df['northing'].min():.2f} to {df['northing'].max():.2f}")
-print(f"   Range:    {df['northing'].max() - df['northing'].min():.2f} m")
+print(f"   Easting:  {e_min:.2f} to {e_max:.2f}")
+print(f"   Range:    {e_max - e_min:.2f} m")
+print(f"   Northing: {n_min:.2f} to {n_max:.2f}")
+print(f"   Range:    {n_max - n_min:.2f} m")
 
 # Show first few points
 print(f"\n📋 First 5 converted points:")
-print(df[['latitude_deg', 'longitude_deg', 'easting', 'northing']].head())
+print(head[['latitude_deg', 'longitude_deg', 'easting', 'northing']])
 
 # Check if beacons exist
-if 'beacon_name' in df.columns:
+if has_beacons:
     print(f"\n🔷 Beacons found:")
-    for beacon in df['beacon_name'].unique():
-        beacon_df = df[df['beacon_name'] == beacon]
-        print(f"   {beacon}: {len(beacon_df)} points")
-        print(f"      Easting range: {beacon_df['easting'].min():.2f} to {beacon_df['easting'].max():.2f}")
-        print(f"      Northing range: {beacon_df['northing'].min():.2f} to {beacon_df['northing'].max():.2f}")
+    for beacon, (count, b_e_min, b_e_max, b_n_min, b_n_max) in beacon_stats.items():
+        print(f"   {beacon}: {count} points")
+        print(f"      Easting range: {b_e_min:.2f} to {b_e_max:.2f}")
+        print(f"      Northing range: {b_n_min:.2f} to {b_n_max:.2f}")
 
 print("\n" + "=" * 60)
 print("✓ Conversion successful!")
-print("=" * 60)
\ No newline at end of file
+print("=" * 60)
@@ -3,7 +3,7 @@ Dredge App - USBL Location and Time Series Data Visualization
 Minimal Skeleton v1.1
 
 Requirements:
-    pip install pyside6 pyqtgraph pandas pyproj numpy
+    pip install pyside6 pyqtgraph pandas pyproj numpy pyarrow
 
 Architecture:
     - Top: Location plot (USBL data with error ellipses)
@@ -11,14 +11,31 @@ Architecture:
     - Linked selection: drag region on time series → highlight on location plot
 """
 
+import os
 import sys
+import time
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 import pyqtgraph as pg
 from pyqtgraph.Qt import QtWidgets, QtCore
-from pyproj import Transformer
 from datetime import datetime
 
+from data_io import ExportWorker, LoadWorker, read_sensor_csv, read_usbl_csv, utm_transformer
+from kernels import downsample_lttb, first_per_cell
+
+# Minimum delay between location highlight updates while dragging a region
+REGION_UPDATE_INTERVAL_MS = 40
+
+# Time series curves are downsampled to this many points per horizontal pixel
+LTTB_POINTS_PER_PIXEL = 2
+
+# Above this many USBL points the location scatter draws one spot per pixel
+LOCATION_BUCKET_MIN_POINTS = 10_000
+
+# gzip levels for the CSV export "Compression" choices (None = plain .csv)
+CSV_GZIP_LEVELS = {"None": None, "Fast": 1, "Best": 9}
+
 
 class DredgeApp(QtWidgets.QMainWindow):
     def __init__(self):
@@ -33,10 +50,42 @@ class DredgeApp(QtWidgets.QMainWindow):
         self.utm_zone = None
         self.core_name = None  # Extracted from USBL filename
         
+        # Time-sorted USBL columns as plain arrays (see _cache_usbl_arrays)
+        self._usbl_times_ns = None
+        self._usbl_east = None
+        self._usbl_north = None
+        self._usbl_lat = None
+        self._usbl_lon = None
+        self._usbl_all_idx = None
+        self._beacon_idx = {}  # beacon name -> sorted row positions
+        self._location_idx = None  # Rows currently shown on the location plot
+        
+        # Reusable gather buffers for the selection scatter (grown on demand)
+        self._sel_x = np.empty(0, dtype=np.float64)
+        self._sel_y = np.empty(0, dtype=np.float64)
+        
+        # Per-column (time_seconds, values) arrays for the time series plots
+        self._ts_cache = {}
+        
         # Annotations storage
         self.annotations = []  # List of annotation dictionaries with full metadata
         self.annotation_id_counter = 1  # For unique IDs
         
+        # Background file load in progress (see _start_load)
+        self._load_thread = None
+        self._load_worker = None
+        
+        # Background export in progress (see _start_export)
+        self._export_thread = None
+        self._export_worker = None
+        
+        # Coalesce region drags: sigRegionChanged fires on every mouse move,
+        # so only the latest position is processed once the timer expires
+        self._region_timer = QtCore.QTimer(self)
+        self._region_timer.setSingleShot(True)
+        self._region_timer.setInterval(REGION_UPDATE_INTERVAL_MS)
+        self._region_timer.timeout.connect(self.on_region_changed)
+        
         self.init_ui()
         
     def init_ui(self):
@@ -106,9 +155,9 @@ class DredgeApp(QtWidgets.QMainWindow):
         layout = QtWidgets.QHBoxLayout(panel)
         
         # USBL file loading
-        usbl_btn = QtWidgets.QPushButton("Load USBL Data")
-        usbl_btn.clicked.connect(self.load_usbl_data)
-        layout.addWidget(usbl_btn)
+        self.usbl_btn = QtWidgets.QPushButton("Load USBL Data")
+        self.usbl_btn.clicked.connect(self.load_usbl_data)
+        layout.addWidget(self.usbl_btn)
         
         self.usbl_label = QtWidgets.QLabel("No USBL data")
         self.usbl_label.setStyleSheet("color: gray;")
@@ -124,9 +173,9 @@ class DredgeApp(QtWidgets.QMainWindow):
         layout.addSpacing(20)
         
         # Sensor file loading
-        sensor_btn = QtWidgets.QPushButton("Load Sensor Data")
-        sensor_btn.clicked.connect(self.load_sensor_data)
-        layout.addWidget(sensor_btn)
+        self.sensor_btn = QtWidgets.QPushButton("Load Sensor Data")
+        self.sensor_btn.clicked.connect(self.load_sensor_data)
+        layout.addWidget(self.sensor_btn)
         
         self.sensor_label = QtWidgets.QLabel("No sensor data")
         self.sensor_label.setStyleSheet("color: gray;")
@@ -173,6 +222,32 @@ class DredgeApp(QtWidgets.QMainWindow):
         export_label.setStyleSheet("font-weight: bold;")
         layout.addWidget(export_label)
         
+        # Output file format
+        format_layout = QtWidgets.QHBoxLayout()
+        format_layout.addWidget(QtWidgets.QLabel("Format:"))
+        self.export_format_selector = QtWidgets.QComboBox()
+        self.export_format_selector.addItems(["Parquet", "CSV"])
+        self.export_format_selector.setToolTip(
+            "Parquet is a compressed binary format: much faster to write/read and smaller on disk.\n"
+            "Choose CSV for files that need to open in a spreadsheet."
+        )
+        format_layout.addWidget(self.export_format_selector)
+        
+        # gzip compression, CSV only (Parquet is always compressed)
+        format_layout.addWidget(QtWidgets.QLabel("Compression:"))
+        self.export_compression_selector = QtWidgets.QComboBox()
+        self.export_compression_selector.addItems(list(CSV_GZIP_LEVELS))
+        self.export_compression_selector.setToolTip(
+            "Write CSV files gzipped (.csv.gz). Fast is nearly as small as Best and much quicker."
+        )
+        self.export_compression_selector.setEnabled(False)
+        self.export_format_selector.currentTextChanged.connect(
+            lambda text: self.export_compression_selector.setEnabled(text == "CSV")
+        )
+        format_layout.addWidget(self.export_compression_selector)
+        format_layout.addStretch()
+        layout.addLayout(format_layout)
+        
         self.export_annotated_btn = QtWidgets.QPushButton("Export Annotated Data")
         self.export_annotated_btn.clicked.connect(self.export_annotated_data)
         self.export_annotated_btn.setEnabled(False)
@@ -193,7 +268,7 @@ class DredgeApp(QtWidgets.QMainWindow):
         label.setStyleSheet("font-weight: bold;")
         layout.addWidget(label)
         
-        # PyQtGraph plot widget with OpenGL
+        # PyQtGraph plot widget (raster painting, not OpenGL)
         self.location_plot = pg.PlotWidget()
         self.location_plot.setBackground('w')
         self.location_plot.showGrid(x=True, y=True, alpha=0.3)
@@ -206,21 +281,34 @@ class DredgeApp(QtWidgets.QMainWindow):
         viewbox.setMouseMode(pg.ViewBox.PanMode)
         viewbox.setMenuEnabled(True)
         
+        # Re-thin the location scatter to screen resolution on zoom/pan
+        viewbox.sigRangeChanged.connect(self._rebucket_location)
+        
         layout.addWidget(self.location_plot)
         
+        # Shared pens/brushes, reused on every setData so pyqtgraph's
+        # symbol cache keeps hitting instead of styling each point
+        self._loc_pen = pg.mkPen(None)
+        self._loc_brush = pg.mkBrush(0, 100, 200, 120)
+        self._sel_pen = pg.mkPen('r', width=2)
+        self._sel_brush = pg.mkBrush(255, 0, 0, 180)
+        
         # Scatter plot items
         self.location_scatter = pg.ScatterPlotItem(
             size=6, 
-            pen=pg.mkPen(None), 
-            brush=pg.mkBrush(0, 100, 200, 120)
+            pen=self._loc_pen, 
+            brush=self._loc_brush
         )
+        # Cache the rendered points so selection/overlay repaints are a blit
+        # (Qt re-renders the cache itself on zoom and when setData updates it)
+        self.location_scatter.setCacheMode(QtWidgets.QGraphicsItem.CacheMode.DeviceCoordinateCache)
         self.location_plot.addItem(self.location_scatter)
         
         # Highlighted selection scatter
         self.location_selection_scatter = pg.ScatterPlotItem(
             size=8,
-            pen=pg.mkPen('r', width=2),
-            brush=pg.mkBrush(255, 0, 0, 180)
+            pen=self._sel_pen,
+            brush=self._sel_brush
         )
         self.location_plot.addItem(self.location_selection_scatter)
         
@@ -285,22 +373,28 @@ class DredgeApp(QtWidgets.QMainWindow):
         self.timeseries_plot_1.showGrid(x=True, y=True, alpha=0.3)
         self.timeseries_plot_1.getAxis('bottom').setStyle(showValues=False)  # Hide bottom labels
         
-        # Enable performance features
+        # Enable performance features (curves are LTTB-downsampled before
+        # setData, so pyqtgraph's own per-paint downsampling stays off)
         self.timeseries_plot_1.setClipToView(True)
-        self.timeseries_plot_1.setDownsampling(auto=True, mode='peak')
+        self.timeseries_plot_1.setDownsampling(auto=False)
         
         # Enable mouse controls
         viewbox1 = self.timeseries_plot_1.getViewBox()
         viewbox1.setMouseMode(pg.ViewBox.PanMode)
         viewbox1.setMenuEnabled(True)
         viewbox1.setAspectLocked(False)
+        viewbox1.sigXRangeChanged.connect(lambda: self._render_curve(1))
         
         plot1_layout.addWidget(self.timeseries_plot_1)
         
         # Plot 1 curve
         self.timeseries_curve_1 = self.timeseries_plot_1.plot(
             pen=pg.mkPen('b', width=1),
-            connect='finite'
+            connect='all'  # NaNs are dropped in _ts_cache, so no per-path finite scan
+        )
+        # Dragging the brush region repaints the area under it; blit the curve
+        self.timeseries_curve_1.curve.setCacheMode(
+            QtWidgets.QGraphicsItem.CacheMode.DeviceCoordinateCache
         )
         
         layout.addWidget(plot1_container)
@@ -328,22 +422,28 @@ class DredgeApp(QtWidgets.QMainWindow):
         # Link X-axes between plots so they zoom/pan together
         self.timeseries_plot_2.setXLink(self.timeseries_plot_1)
         
-        # Enable performance features
+        # Enable performance features (curves are LTTB-downsampled before
+        # setData, so pyqtgraph's own per-paint downsampling stays off)
         self.timeseries_plot_2.setClipToView(True)
-        self.timeseries_plot_2.setDownsampling(auto=True, mode='peak')
+        self.timeseries_plot_2.setDownsampling(auto=False)
         
         # Enable mouse controls
         viewbox2 = self.timeseries_plot_2.getViewBox()
         viewbox2.setMouseMode(pg.ViewBox.PanMode)
         viewbox2.setMenuEnabled(True)
         viewbox2.setAspectLocked(False)
+        viewbox2.sigXRangeChanged.connect(lambda: self._render_curve(2))
         
         plot2_layout.addWidget(self.timeseries_plot_2)
         
         # Plot 2 curve
         self.timeseries_curve_2 = self.timeseries_plot_2.plot(
             pen=pg.mkPen('r', width=1),
-            connect='finite'
+            connect='all'  # NaNs are dropped in _ts_cache, so no per-path finite scan
+        )
+        # Dragging the brush region repaints the area under it; blit the curve
+        self.timeseries_curve_2.curve.setCacheMode(
+            QtWidgets.QGraphicsItem.CacheMode.DeviceCoordinateCache
         )
         
         layout.addWidget(plot2_container)
@@ -369,6 +469,10 @@ class DredgeApp(QtWidgets.QMainWindow):
         self.region_1.sigRegionChanged.connect(lambda: self._sync_regions(1))
         self.region_2.sigRegionChanged.connect(lambda: self._sync_regions(2))
         
+        # Apply the final position immediately when a drag ends
+        self.region_1.sigRegionChangeFinished.connect(self._flush_region_update)
+        self.region_2.sigRegionChangeFinished.connect(self._flush_region_update)
+        
         # Keep reference to "main" region for compatibility
         self.region = self.region_2
         
@@ -390,7 +494,14 @@ class DredgeApp(QtWidgets.QMainWindow):
             self.region_1.setRegion(self.region_2.getRegion())
             self.region_1.blockSignals(False)
         
-        # Trigger the annotation highlight update
+        # Schedule the annotation highlight update (coalesced while dragging;
+        # not restarted, so a continuous drag still updates every interval)
+        if not self._region_timer.isActive():
+            self._region_timer.start()
+        
+    def _flush_region_update(self):
+        """Run any pending region update now instead of waiting for the timer"""
+        self._region_timer.stop()
         self.on_region_changed()
         
     def load_usbl_data(self):
@@ -402,34 +513,38 @@ class DredgeApp(QtWidgets.QMainWindow):
         if not filename:
             return
             
+        # Extract core name from filename (e.g., "RR2509-D13" from "RR2509-D13_usbl.csv")
+        basename = os.path.basename(filename)
+        # Remove extension and common suffixes
+        core_name = basename.replace('.csv', '').replace('_usbl', '').replace('_USBL', '')
+        self.core_name = core_name
+        
+        # Read and parse off the GUI thread; _on_usbl_loaded finishes the load
+        self._start_load(read_usbl_csv, filename, "USBL", self._on_usbl_loaded)
+        
+    def _on_usbl_loaded(self, usbl_df):
+        """Convert, cache and plot freshly read USBL data"""
+        self._end_load()
         try:
-            # Extract core name from filename (e.g., "RR2509-D13" from "RR2509-D13_usbl.csv")
-            import os
-            basename = os.path.basename(filename)
-            # Remove extension and common suffixes
-            core_name = basename.replace('.csv', '').replace('_usbl', '').replace('_USBL', '')
-            self.core_name = core_name
-            
-            # Load data
-            self.usbl_df = pd.read_csv(filename)
-            
-            # Parse datetime with mixed format support
-            self.usbl_df['datetime'] = pd.to_datetime(self.usbl_df['datetime'], format='mixed', utc=True)
+            self.usbl_df = usbl_df
             
             # Convert lat/lon to UTM
             self.convert_to_utm()
             
+            # Sort by time and cache plain arrays for fast region lookups
+            self._cache_usbl_arrays()
+            
             # Update UI
             self.usbl_label.setText(f"✓ {len(self.usbl_df)} USBL points")
             self.usbl_label.setStyleSheet("color: green;")
             
             # Populate beacon selector
             if 'beacon_name' in self.usbl_df.columns:
-                beacons = self.usbl_df['beacon_name'].unique()
+                # One counting pass over the category codes for all beacons
+                counts = self.usbl_df['beacon_name'].value_counts(sort=False)
                 self.beacon_selector.clear()
                 self.beacon_selector.addItem("All Beacons")
-                for beacon in beacons:
-                    count = (self.usbl_df['beacon_name'] == beacon).sum()
+                for beacon, count in counts[counts > 0].items():
                     self.beacon_selector.addItem(f"{beacon} ({count})")
             
             # Plot location data
@@ -449,29 +564,29 @@ class DredgeApp(QtWidgets.QMainWindow):
         if not filename:
             return
             
+        # Read and parse off the GUI thread; _on_sensor_loaded finishes the load
+        self._start_load(read_sensor_csv, filename, "sensor", self._on_sensor_loaded)
+        
+    def _on_sensor_loaded(self, sensor_df):
+        """Cache and plot freshly read sensor data"""
+        self._end_load()
         try:
-            # Load data, skipping comment lines
-            with open(filename, 'r') as f:
-                lines = f.readlines()
-                # Find where actual data starts (after # comments)
-                data_start = 0
-                for i, line in enumerate(lines):
-                    if not line.startswith('#'):
-                        data_start = i
-                        break
-            
-            self.sensor_df = pd.read_csv(filename, skiprows=data_start)
-            
-            # Parse datetime with mixed format to handle inconsistent microseconds
-            self.sensor_df['datetime'] = pd.to_datetime(self.sensor_df['datetime'], format='mixed')
-            # Make timezone-aware if it's timezone-naive
-            if self.sensor_df['datetime'].dt.tz is None:
-                self.sensor_df['datetime'] = self.sensor_df['datetime'].dt.tz_localize('UTC')
+            self.sensor_df = sensor_df
+            
+            # The visible-window search and LTTB both need time-ordered samples
+            # (NaT rows first, where the plot cache drops them)
+            if not self.sensor_df['datetime'].is_monotonic_increasing:
+                self.sensor_df = self.sensor_df.sort_values(
+                    'datetime', kind='stable', na_position='first'
+                ).reset_index(drop=True)
             
             # Update column selectors for both plots (exclude datetime)
             numeric_columns = [col for col in self.sensor_df.columns 
                              if col != 'datetime' and pd.api.types.is_numeric_dtype(self.sensor_df[col])]
             
+            # Precompute plot arrays once so column switches are just lookups
+            self._build_timeseries_cache(numeric_columns)
+            
             # Block signals while populating to avoid triggering updates prematurely
             self.column_selector_1.blockSignals(True)
             self.column_selector_2.blockSignals(True)
@@ -502,6 +617,46 @@ class DredgeApp(QtWidgets.QMainWindow):
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Error", f"Failed to load sensor data:\n{str(e)}")
             
+    def _start_load(self, read, filename, kind, on_loaded):
+        """Run read(filename) on a background thread with a busy indicator"""
+        self.usbl_btn.setEnabled(False)
+        self.sensor_btn.setEnabled(False)
+        self._load_kind = kind
+        self.statusBar().showMessage(f"Loading {kind} data...")
+        
+        # Range (0, 0) shows a busy bar; only appears if the read takes a while
+        self._load_progress = QtWidgets.QProgressDialog(f"Loading {kind} data...", None, 0, 0, self)
+        self._load_progress.setWindowTitle("Loading")
+        self._load_progress.setWindowModality(QtCore.Qt.WindowModal)
+        self._load_progress.setMinimumDuration(500)
+        
+        # Keep references so neither object is collected while running
+        self._load_thread = QtCore.QThread(self)
+        self._load_worker = LoadWorker(read, filename)
+        self._load_worker.moveToThread(self._load_thread)
+        
+        # on_loaded is a method of this window, so it runs on the GUI thread
+        self._load_thread.started.connect(self._load_worker.run)
+        self._load_worker.loaded.connect(on_loaded)
+        self._load_worker.failed.connect(self._on_load_failed)
+        self._load_worker.loaded.connect(self._load_thread.quit)
+        self._load_worker.failed.connect(self._load_thread.quit)
+        self._load_thread.finished.connect(self._load_worker.deleteLater)
+        self._load_thread.finished.connect(self._load_thread.deleteLater)
+        self._load_thread.start()
+        
+    def _end_load(self):
+        """Close the busy indicator and re-enable loading"""
+        self._load_progress.close()
+        self._load_thread = None
+        self._load_worker = None
+        self.usbl_btn.setEnabled(True)
+        self.sensor_btn.setEnabled(True)
+        
+    def _on_load_failed(self, message):
+        self._end_load()
+        QtWidgets.QMessageBox.critical(self, "Error", f"Failed to load {self._load_kind} data:\n{message}")
+        
     def convert_to_utm(self):
         """Convert lat/lon to UTM coordinates"""
         if self.usbl_df is None:
@@ -515,48 +670,106 @@ class DredgeApp(QtWidgets.QMainWindow):
         utm_zone = int((lon + 180) / 6) + 1
         hemisphere = 'north' if lat >= 0 else 'south'
         
-        # Create transformer
+        # Create transformer (cached per zone)
         self.utm_zone = utm_zone
-        self.utm_transformer = Transformer.from_crs(
-            "EPSG:4326",  # WGS84
-            f"EPSG:326{utm_zone:02d}" if hemisphere == 'north' else f"EPSG:327{utm_zone:02d}",
-            always_xy=True
-        )
+        self.utm_transformer = utm_transformer(utm_zone, hemisphere)
         
-        # Transform coordinates
-        easting, northing = self.utm_transformer.transform(
-            self.usbl_df['longitude_deg'].values,
-            self.usbl_df['latitude_deg'].values
-        )
+        # Transform coordinates in one batched call: PROJ works in place on a
+        # contiguous float64 (2, n) buffer instead of allocating new outputs
+        coords = np.empty((2, len(self.usbl_df)), dtype=np.float64)
+        coords[0] = self.usbl_df['longitude_deg'].to_numpy(dtype=np.float64)
+        coords[1] = self.usbl_df['latitude_deg'].to_numpy(dtype=np.float64)
+        self.utm_transformer.transform(coords[0], coords[1], inplace=True)
         
-        self.usbl_df['easting'] = easting
-        self.usbl_df['northing'] = northing
+        self.usbl_df = self.usbl_df.assign(easting=coords[0], northing=coords[1])
         
         print(f"Converted to UTM Zone {utm_zone}{hemisphere[0].upper()}")
         
+    def _cache_usbl_arrays(self):
+        """Sort USBL data by time and cache the columns used on every region update"""
+        # NaT views as INT64_MIN, so unparsed times go first to keep the int64
+        # array sorted (and outside every region's bounds)
+        self.usbl_df = self.usbl_df.sort_values(
+            'datetime', kind='stable', na_position='first'
+        ).reset_index(drop=True)
+        
+        # int64 ns since epoch (UTC) so region bounds can be binary-searched
+        self._usbl_times_ns = (
+            self.usbl_df['datetime'].dt.tz_convert(None).to_numpy('datetime64[ns]').view(np.int64)
+        )
+        self._usbl_east = self.usbl_df['easting'].to_numpy()
+        self._usbl_north = self.usbl_df['northing'].to_numpy()
+        self._usbl_lat = self.usbl_df['latitude_deg'].to_numpy()
+        self._usbl_lon = self.usbl_df['longitude_deg'].to_numpy()
+        
+        # Row positions per beacon, so filtering is a lookup instead of a scan
+        self._usbl_all_idx = np.arange(len(self.usbl_df))
+        if 'beacon_name' in self.usbl_df.columns:
+            # Few distinct beacons: store as category so grouping works on int codes
+            self.usbl_df['beacon_name'] = self.usbl_df['beacon_name'].astype('category')
+            # Keyed by the selector text: pyarrow reads numeric ids (1, 2) as ints
+            self._beacon_idx = {
+                str(name): idx for name, idx in self.usbl_df.groupby(
+                    'beacon_name', sort=False, observed=True
+                ).indices.items()
+            }
+        else:
+            self._beacon_idx = {}
+        
+    def _selected_beacon_indices(self):
+        """Sorted row positions of the beacon chosen in the selector (all rows for "All Beacons")"""
+        selected_beacon = self.beacon_selector.currentText()
+        if selected_beacon == "All Beacons":
+            return self._usbl_all_idx
+        # Extract beacon name (before the count in parentheses)
+        beacon_name = selected_beacon.split(' (')[0]
+        return self._beacon_idx.get(beacon_name, np.array([], dtype=np.intp))
+        
     def plot_location_data(self):
         """Plot USBL location data"""
-        if self.usbl_df is None:
+        if self._usbl_all_idx is None:
             return
         
         # Filter by beacon if selected
-        df_to_plot = self.usbl_df
-        selected_beacon = self.beacon_selector.currentText()
-        if selected_beacon != "All Beacons" and 'beacon_name' in self.usbl_df.columns:
-            # Extract beacon name (before the count in parentheses)
-            beacon_name = selected_beacon.split(' (')[0]
-            df_to_plot = self.usbl_df[self.usbl_df['beacon_name'] == beacon_name]
-            
-        # Plot all points
-        spots = [{
-            'pos': (row['easting'], row['northing']),
-            'data': i
-        } for i, row in df_to_plot.iterrows()]
-        
-        self.location_scatter.setData(spots=spots)
+        idx = self._selected_beacon_indices()
+        self._location_idx = idx
+        
+        # Fit the view to the data, then plot it thinned to the new zoom level
+        # (rows with a missing position are ignored; NaN would break setRange)
+        x = self._usbl_east[idx]
+        y = self._usbl_north[idx]
+        finite = np.isfinite(x) & np.isfinite(y)
+        if finite.any():
+            x = x[finite]
+            y = y[finite]
+            self.location_plot.setRange(xRange=(x.min(), x.max()), yRange=(y.min(), y.max()))
+        self._rebucket_location()
+        
+    def _rebucket_location(self):
+        """Plot the current location points, at most one spot per screen pixel
+        
+        Points falling in the same pixel-sized cell draw identically, so for
+        large USBL sets only the first point of each occupied cell is kept.
+        """
+        idx = self._location_idx
+        if idx is None:
+            return
         
-        # Auto-range to fit data
-        self.location_plot.autoRange()
+        x = self._usbl_east[idx]
+        y = self._usbl_north[idx]
+        px_w, px_h = self.location_plot.getViewBox().viewPixelSize()
+        if len(idx) > LOCATION_BUCKET_MIN_POINTS and px_w > 0 and px_h > 0:
+            first = first_per_cell(x, y, px_w, px_h)
+            idx, x, y = idx[first], x[first], y[first]
+        
+        # Plot all points (whole columns at once, no per-point spot dicts)
+        self.location_scatter.setData(
+            x=x,
+            y=y,
+            data=idx,
+            pen=self._loc_pen,
+            brush=self._loc_brush
+        )
         
     def update_beacon_filter(self):
         """Update location plot when beacon filter changes"""
@@ -591,36 +804,92 @@ class DredgeApp(QtWidgets.QMainWindow):
         viewbox = plot_widget.getViewBox()
         current_x_range = viewbox.viewRange()[0]
             
-        # Filter out NaN values (common with sparse data from outer merge)
-        valid_mask = self.sensor_df[column].notna()
-        valid_data = self.sensor_df[valid_mask].reset_index(drop=True)
-        
-        if len(valid_data) == 0:
+        # NaN-free (time, value) arrays precomputed at load
+        cached = self._ts_cache.get(column)
+        if cached is None or len(cached[0]) == 0:
             # No data to plot
             curve.setData([], [])
             return
-            
-        # Convert datetime to timestamp (seconds since epoch) for x-axis
-        time_values = valid_data['datetime'].values.astype('datetime64[s]').astype(np.float64)
-        y_values = valid_data[column].values
-        
-        # Update the curve
-        curve.setData(time_values, y_values)
         
         # Update axis labels
         plot_widget.setLabel('left', column)
         
         # Restore X-range to keep axis fixed when switching columns
         # Only do this if we had a previous range and it's valid
+        first_plot = False
         if self.fixed_x_range is not None:
             viewbox.setXRange(*self.fixed_x_range, padding=0)
         elif current_x_range[0] != current_x_range[1]:
-            # First time plotting - store the auto-range
+            # First time plotting - auto-range over the full data
             viewbox.enableAutoRange(axis='x')
             viewbox.enableAutoRange(axis='y')
+            first_plot = True
+        
+        # Update the curve (downsampled to the visible range)
+        self._render_curve(plot_num)
+        
+        if first_plot:
             # After auto-range, store it
             QtCore.QTimer.singleShot(100, lambda: self._store_x_range(plot_widget))
     
+    def _render_curve(self, plot_num):
+        """Push the visible part of a plot's column to its curve, LTTB-downsampled
+        to about LTTB_POINTS_PER_PIXEL points per horizontal pixel
+        
+        Args:
+            plot_num: 1 or 2, indicating which plot to render
+        """
+        if self.sensor_df is None:
+            return
+        
+        if plot_num == 1:
+            column = self.column_selector_1.currentText()
+            viewbox = self.timeseries_plot_1.getViewBox()
+            curve = self.timeseries_curve_1
+        else:
+            column = self.column_selector_2.currentText()
+            viewbox = self.timeseries_plot_2.getViewBox()
+            curve = self.timeseries_curve_2
+        
+        cached = self._ts_cache.get(column)
+        if cached is None or len(cached[0]) == 0:
+            return
+        time_values, y_values = cached
+        
+        # While auto-ranging the whole series is in view; otherwise only the
+        # visible window plus half a window either side (so short pans don't
+        # expose an empty edge before the next render)
+        width_px = max(int(viewbox.width()), 500)
+        if viewbox.autoRangeEnabled()[0]:
+            lo, hi = 0, len(time_values)
+            n_out = width_px * LTTB_POINTS_PER_PIXEL
+        else:
+            x_min, x_max = viewbox.viewRange()[0]
+            pad = (x_max - x_min) / 2
+            lo = max(np.searchsorted(time_values, x_min - pad, side='left') - 1, 0)
+            hi = min(np.searchsorted(time_values, x_max + pad, side='right') + 1, len(time_values))
+            n_out = 2 * width_px * LTTB_POINTS_PER_PIXEL
+        
+        curve.setData(*downsample_lttb(time_values[lo:hi], y_values[lo:hi], n_out))
+    
+    def _build_timeseries_cache(self, numeric_columns):
+        """Precompute NaN-free (time, value) arrays for every numeric sensor column"""
+        # Seconds since epoch for the x-axis, converted once for all columns:
+        # a view of the ns ticks scaled in one pass (a datetime64[s] cast would
+        # copy twice and truncate sub-second samples onto the same x)
+        t = self.sensor_df['datetime'].dt.tz_convert(None).to_numpy('datetime64[ns]').view(np.int64) / 1e9
+        # Unparsed (NaT) times would plot at INT64_MIN ns, far off the axis
+        has_time = self.sensor_df['datetime'].notna().to_numpy()
+        
+        self._ts_cache = {}
+        for col in numeric_columns:
+            # Filter out NaN values (common with sparse data from outer merge).
+            # float32 is plenty for plotting and halves what is handed to Qt;
+            # the time axis stays float64 (epoch seconds need the mantissa)
+            y = self.sensor_df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+            valid = np.isfinite(y) & has_time
+            self._ts_cache[col] = (t[valid], y[valid])
+    
     def _store_x_range(self, plot_widget):
         """Helper to store the current X-range after auto-ranging"""
         viewbox = plot_widget.getViewBox()
@@ -671,42 +940,55 @@ class DredgeApp(QtWidgets.QMainWindow):
         
     def on_region_changed(self):
         """Handle region selection change - update location plot"""
-        if self.sensor_df is None or self.usbl_df is None:
+        if self.sensor_df is None or self._usbl_times_ns is None:
             return
             
-        # Get region bounds (in seconds since epoch)
+        # Get region bounds (in seconds since epoch). Kept as plain numbers:
+        # this runs on every drag update, so no Timestamps are built
         min_time, max_time = self.region.getRegion()
         
-        # Convert back to datetime with UTC timezone to match USBL data
-        min_dt = pd.Timestamp(min_time, unit='s', tz='UTC')
-        max_dt = pd.Timestamp(max_time, unit='s', tz='UTC')
+        # Filter USBL data by time range (binary search on the sorted times)
+        lo, hi = self._usbl_time_slice(round(min_time * 1e9), round(max_time * 1e9))
         
-        # Filter USBL data by time range
-        mask = (self.usbl_df['datetime'] >= min_dt) & (self.usbl_df['datetime'] <= max_dt)
-        selected_usbl = self.usbl_df[mask]
-        
-        # Also filter by beacon if selected
-        selected_beacon = self.beacon_selector.currentText()
-        if selected_beacon != "All Beacons" and 'beacon_name' in selected_usbl.columns:
-            beacon_name = selected_beacon.split(' (')[0]
-            selected_usbl = selected_usbl[selected_usbl['beacon_name'] == beacon_name]
+        # Also filter by beacon if selected: the beacon's row positions are
+        # sorted, so the time window is another pair of binary searches
+        beacon_idx = self._selected_beacon_indices()
+        selected_idx = beacon_idx[
+            np.searchsorted(beacon_idx, lo):np.searchsorted(beacon_idx, hi)
+        ]
         
         # Update highlighted scatter plot
-        if len(selected_usbl) > 0:
-            spots = [{
-                'pos': (row['easting'], row['northing']),
-                'data': i
-            } for i, row in selected_usbl.iterrows()]
-            self.location_selection_scatter.setData(spots=spots)
+        k = len(selected_idx)
+        if k > 0:
+            if k > len(self._sel_x):
+                size = max(k, 2 * len(self._sel_x))
+                self._sel_x = np.empty(size, dtype=np.float64)
+                self._sel_y = np.empty(size, dtype=np.float64)
+            # Gather into the preallocated buffers (setData copies them anyway)
+            self.location_selection_scatter.setData(
+                x=np.take(self._usbl_east, selected_idx, out=self._sel_x[:k]),
+                y=np.take(self._usbl_north, selected_idx, out=self._sel_y[:k]),
+                data=selected_idx,
+                pen=self._sel_pen,
+                brush=self._sel_brush
+            )
         else:
             self.location_selection_scatter.setData([])
             
         # Update status
         self.statusBar().showMessage(
-            f"Selected: {len(selected_usbl)} USBL points | "
-            f"Time range: {min_dt.strftime('%H:%M:%S')} - {max_dt.strftime('%H:%M:%S')}"
+            f"Selected: {len(selected_idx)} USBL points | "
+            f"Time range: {time.strftime('%H:%M:%S', time.gmtime(min_time))} - "
+            f"{time.strftime('%H:%M:%S', time.gmtime(max_time))}"
         )
         
+    def _usbl_time_slice(self, min_ns, max_ns):
+        """Row range [lo, hi) of the time-sorted USBL data within [min_ns, max_ns]
+        (int ns since epoch, UTC)"""
+        lo = np.searchsorted(self._usbl_times_ns, min_ns, side='left')
+        hi = np.searchsorted(self._usbl_times_ns, max_ns, side='right')
+        return int(lo), int(hi)
+        
     def save_annotation(self):
         """Save the current selected region as an annotation with full metadata"""
         if self.usbl_df is None or self.sensor_df is None:
@@ -719,14 +1001,16 @@ class DredgeApp(QtWidgets.QMainWindow):
         
         # Get region bounds
         min_time, max_time = self.region.getRegion()
-        min_dt = pd.Timestamp(min_time, unit='s', tz='UTC')
-        max_dt = pd.Timestamp(max_time, unit='s', tz='UTC')
+        min_ns, max_ns = round(min_time * 1e9), round(max_time * 1e9)
+        min_dt = pd.Timestamp(min_ns, tz='UTC')
+        max_dt = pd.Timestamp(max_ns, tz='UTC')
         
-        # Filter USBL data by time range
-        mask = (self.usbl_df['datetime'] >= min_dt) & (self.usbl_df['datetime'] <= max_dt)
-        selected_usbl = self.usbl_df[mask]
+        # Filter USBL data by time range (rows lo..hi-1 of the sorted data);
+        # same ns bounds as on_region_changed, so the counts always agree
+        lo, hi = self._usbl_time_slice(min_ns, max_ns)
+        num_points = hi - lo
         
-        if len(selected_usbl) == 0:
+        if num_points == 0:
             QtWidgets.QMessageBox.warning(self, "No Data", "No USBL points found in selected time range.")
             return
         
@@ -749,7 +1033,7 @@ class DredgeApp(QtWidgets.QMainWindow):
         # Show preview
         preview_label = QtWidgets.QLabel(
             f"Time range: {min_dt.strftime('%Y-%m-%d %H:%M:%S')} to {max_dt.strftime('%Y-%m-%d %H:%M:%S')}\n"
-            f"USBL points: {len(selected_usbl)}"
+            f"USBL points: {num_points}"
         )
         preview_label.setStyleSheet("color: gray; font-size: 10px;")
         dialog_layout.addWidget(preview_label)
@@ -768,9 +1052,8 @@ class DredgeApp(QtWidgets.QMainWindow):
                 QtWidgets.QMessageBox.warning(self, "Invalid Name", "Please enter an annotation name.")
                 return
                 
-            # Get start/end coordinates (first and last USBL points in selection)
-            start_point = selected_usbl.iloc[0]
-            end_point = selected_usbl.iloc[-1]
+            # Start/end coordinates: first and last USBL points in selection
+            start, end = lo, hi - 1
             
             # Create annotation record with full metadata
             annotation = {
@@ -778,36 +1061,42 @@ class DredgeApp(QtWidgets.QMainWindow):
                 'annotation_name': name,
                 'start_datetime': min_dt,
                 'end_datetime': max_dt,
-                'start_lat': start_point.get('latitude', None),
-                'start_lon': start_point.get('longitude', None),
-                'end_lat': end_point.get('latitude', None),
-                'end_lon': end_point.get('longitude', None),
-                'start_easting': start_point['easting'],
-                'start_northing': start_point['northing'],
-                'end_easting': end_point['easting'],
-                'end_northing': end_point['northing'],
+                'start_lat': float(self._usbl_lat[start]),
+                'start_lon': float(self._usbl_lon[start]),
+                'end_lat': float(self._usbl_lat[end]),
+                'end_lon': float(self._usbl_lon[end]),
+                'start_easting': float(self._usbl_east[start]),
+                'start_northing': float(self._usbl_north[start]),
+                'end_easting': float(self._usbl_east[end]),
+                'end_northing': float(self._usbl_north[end]),
                 'utm_zone': self.utm_zone,
-                'num_usbl_points': len(selected_usbl),
+                'num_usbl_points': num_points,
                 'notes': notes_input.toPlainText().strip()
             }
             
             self.annotations.append(annotation)
             self.annotation_id_counter += 1
             
-            # Update annotations list UI
-            self.refresh_annotations_list()
+            # Update annotations list UI (append just the new row)
+            self.annotations_list.addItem(self._annotation_item_text(annotation))
             
             # Enable export button
             self.export_annotated_btn.setEnabled(True)
             
-            self.statusBar().showMessage(f"Annotation '{name}' saved ({len(selected_usbl)} points)")
+            self.statusBar().showMessage(f"Annotation '{name}' saved ({num_points} points)")
     
+    def _annotation_item_text(self, ann):
+        """Label for an annotation in the annotations list"""
+        return f"[{ann['annotation_id']}] {ann['annotation_name']} ({ann['num_usbl_points']} pts)"
+        
     def refresh_annotations_list(self):
-        """Refresh the annotations list widget"""
+        """Rebuild the annotations list widget from self.annotations"""
+        # Single add and delete update the list in place; this full rebuild
+        # repaints once at the end rather than once per item
+        self.annotations_list.setUpdatesEnabled(False)
         self.annotations_list.clear()
-        for ann in self.annotations:
-            item_text = f"[{ann['annotation_id']}] {ann['annotation_name']} ({ann['num_usbl_points']} pts)"
-            self.annotations_list.addItem(item_text)
+        self.annotations_list.addItems([self._annotation_item_text(ann) for ann in self.annotations])
+        self.annotations_list.setUpdatesEnabled(True)
     
     def on_annotation_selected(self):
         """Handle annotation selection in the list"""
@@ -830,7 +1119,7 @@ class DredgeApp(QtWidgets.QMainWindow):
         
         if reply == QtWidgets.QMessageBox.Yes:
             self.annotations.pop(selected_index)
-            self.refresh_annotations_list()
+            self.annotations_list.takeItem(selected_index)
             
             if len(self.annotations) == 0:
                 self.export_annotated_btn.setEnabled(False)
@@ -869,25 +1158,19 @@ class DredgeApp(QtWidgets.QMainWindow):
         if not output_dir:
             return
         
+        # Normalize the path (convert to proper format for OS)
+        output_dir = os.path.normpath(output_dir)
+        
+        # Ensure output_dir is actually a directory we can write to (checked
+        # without creating a probe file)
+        if not os.path.isdir(output_dir):
+            QtWidgets.QMessageBox.warning(self, "Export Error", f"Selected path is not a directory: {output_dir}")
+            return
+        if not os.access(output_dir, os.W_OK):
+            QtWidgets.QMessageBox.warning(self, "Export Error", f"Cannot write to directory: {output_dir}")
+            return
+        
         try:
-            import os
-            
-            # Normalize the path (convert to proper format for OS)
-            output_dir = os.path.normpath(output_dir)
-            
-            # Ensure output_dir is actually a directory
-            if not os.path.isdir(output_dir):
-                raise ValueError(f"Selected path is not a directory: {output_dir}")
-            
-            # Test if we can write to this directory
-            test_file = os.path.join(output_dir, ".write_test")
-            try:
-                with open(test_file, 'w') as f:
-                    f.write("test")
-                os.remove(test_file)
-            except (PermissionError, IOError) as e:
-                raise PermissionError(f"Cannot write to directory: {output_dir}\n\n{str(e)}")
-            
             # Create filename prefix from core name + timestamp
             from datetime import datetime as dt
             timestamp = dt.now().strftime("%Y%m%d_%H%M%S")
@@ -897,56 +1180,122 @@ class DredgeApp(QtWidgets.QMainWindow):
             else:
                 prefix = f"annotations_{timestamp}"
             
+            # File format selected in the Export section
+            export_format = self.export_format_selector.currentText()
+            ext = '.parquet' if export_format == "Parquet" else '.csv'
+            gzip_level = None
+            if export_format == "CSV":
+                gzip_level = CSV_GZIP_LEVELS[self.export_compression_selector.currentText()]
+                if gzip_level is not None:
+                    ext += '.gz'
+            
             # 1. Export annotation metadata
             annotations_df = pd.DataFrame(self.annotations)
-            metadata_filename = f"{prefix}_metadata.csv"
+            metadata_filename = f"{prefix}_metadata{ext}"
             metadata_path = os.path.join(output_dir, metadata_filename)
             
             # Normalize the output path
             metadata_path = os.path.normpath(metadata_path)
-            annotations_df.to_csv(metadata_path, index=False)
             
             # 2. Create USBL data with boolean annotation columns
-            usbl_export = self.usbl_df.copy()
+            # Add a boolean column for each annotation name: TRUE for any USBL
+            # point within the time range of an annotation with that name.
+            # Rows are time-sorted, so each range is a contiguous block
+            names = list(dict.fromkeys(ann['annotation_name'] for ann in self.annotations))
+            name_col = {name: i for i, name in enumerate(names)}
             
-            # Add a boolean column for each annotation
-            for ann in self.annotations:
-                col_name = ann['annotation_name']
-                # Mark TRUE for any USBL point within the annotation's time range
-                mask = (usbl_export['datetime'] >= ann['start_datetime']) & \
-                       (usbl_export['datetime'] <= ann['end_datetime'])
-                usbl_export[col_name] = mask
+            # Row ranges for every annotation from two vectorized binary searches
+            starts = np.array([ann['start_datetime'].value for ann in self.annotations], dtype=np.int64)
+            ends = np.array([ann['end_datetime'].value for ann in self.annotations], dtype=np.int64)
+            los = np.searchsorted(self._usbl_times_ns, starts, side='left')
+            his = np.searchsorted(self._usbl_times_ns, ends, side='right')
             
-            usbl_filename = f"{prefix}_usbl_annotated.csv"
+            # All columns are filled in one preallocated block (column-major,
+            # so each column is contiguous) and appended straight to an Arrow
+            # table of the USBL data; no combined DataFrame is built
+            masks = np.zeros((len(self.usbl_df), len(names)), dtype=bool, order='F')
+            for ann, lo, hi in zip(self.annotations, los, his):
+                masks[lo:hi, name_col[ann['annotation_name']]] = True
+            usbl_export = pa.Table.from_pandas(self.usbl_df, preserve_index=False)
+            for i, name in enumerate(names):
+                usbl_export = usbl_export.append_column(name, pa.array(masks[:, i]))
+            
+            usbl_filename = f"{prefix}_usbl_annotated{ext}"
             usbl_path = os.path.join(output_dir, usbl_filename)
             usbl_path = os.path.normpath(usbl_path)
-            usbl_export.to_csv(usbl_path, index=False)
             
-            QtWidgets.QMessageBox.information(
-                self, "Export Complete",
+            # Files are written on a worker thread; the summary is shown when it finishes
+            self._export_summary = (
                 f"Exported:\n\n"
                 f"1. {metadata_path}\n"
                 f"   ({len(self.annotations)} annotations)\n\n"
                 f"2. {usbl_path}\n"
-                f"   ({len(usbl_export)} USBL points with {len(self.annotations)} annotation columns)"
+                f"   ({usbl_export.num_rows} USBL points with {len(names)} annotation columns)"
+            )
+            self._export_dir = output_dir
+            self._start_export(
+                [(pa.Table.from_pandas(annotations_df, preserve_index=False), metadata_path),
+                 (usbl_export, usbl_path)],
+                export_format, gzip_level
             )
-            
-            self.statusBar().showMessage(f"Exported annotated data to {output_dir}")
             
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Export Error", f"Failed to export:\n{str(e)}")
             
-    def save_current_region(self):
-        """Deprecated - replaced by save_annotation"""
-        pass
-            
-    def export_data(self):
-        """Deprecated - use export_annotated_data instead"""
-        QtWidgets.QMessageBox.information(self, "Note", "Please use 'Export Annotated Data' button in the Annotations panel.")
-            
-    def tag_data_with_regions(self):
-        """Deprecated - functionality moved to export_annotated_data"""
-        pass
+    def _start_export(self, jobs, export_format, gzip_level=None):
+        """Write the export tables on a background thread with a progress dialog"""
+        self.export_annotated_btn.setEnabled(False)
+        
+        self._export_progress = QtWidgets.QProgressDialog(
+            "Writing export files...", None, 0, sum(table.num_rows for table, _ in jobs), self
+        )
+        self._export_progress.setWindowTitle("Exporting")
+        self._export_progress.setWindowModality(QtCore.Qt.WindowModal)
+        self._export_progress.setMinimumDuration(500)
+        self._export_progress.setValue(0)
+        
+        # Keep references so neither object is collected while running
+        self._export_thread = QtCore.QThread(self)
+        self._export_worker = ExportWorker(jobs, export_format, gzip_level)
+        self._export_worker.moveToThread(self._export_thread)
+        
+        self._export_thread.started.connect(self._export_worker.run)
+        self._export_worker.progress.connect(self._export_progress.setValue)
+        self._export_worker.finished.connect(self._on_export_finished)
+        self._export_worker.failed.connect(self._on_export_failed)
+        self._export_worker.finished.connect(self._export_thread.quit)
+        self._export_worker.failed.connect(self._export_thread.quit)
+        self._export_thread.finished.connect(self._export_worker.deleteLater)
+        self._export_thread.finished.connect(self._export_thread.deleteLater)
+        self._export_thread.start()
+        
+    def _end_export(self):
+        """Close the progress dialog and re-enable exporting"""
+        self._export_progress.close()
+        self._export_thread = None
+        self._export_worker = None
+        self.export_annotated_btn.setEnabled(len(self.annotations) > 0)
+        
+    def _on_export_finished(self):
+        self._end_export()
+        QtWidgets.QMessageBox.information(self, "Export Complete", self._export_summary)
+        self.statusBar().showMessage(f"Exported annotated data to {self._export_dir}")
+        
+    def _on_export_failed(self, message):
+        self._end_export()
+        QtWidgets.QMessageBox.critical(self, "Export Error", f"Failed to export:\n{message}")
+        
+    def closeEvent(self, event):
+        """Let a running export finish so its files are not left truncated"""
+        # Wait out a load in progress so its thread is not destroyed while running
+        if self._load_thread is not None:
+            self._load_thread.quit()
+            self._load_thread.wait()
+        if self._export_thread is not None:
+            self.statusBar().showMessage("Finishing export...")
+            self._export_thread.quit()
+            self._export_thread.wait()
+        super().closeEvent(event)
 
 
 def main():
@@ -3,7 +3,7 @@ Dual Data Viewer - USBL Location and Time Series Data Visualization
 Minimal Skeleton v1.0
 
 Requirements:
-    pip install pyside6 pyqtgraph pandas pyproj numpy
+    pip install pyside6 pyqtgraph pandas pyproj numpy pyarrow
 
 Architecture:
     - Top: Location plot (USBL data with error ellipses)
@@ -12,13 +12,22 @@ Architecture:
 """
 
 import sys
+import time
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 import pyqtgraph as pg
 from pyqtgraph.Qt import QtWidgets, QtCore
-from pyproj import Transformer
 from datetime import datetime
 
+from data_io import (
+    LoadWorker, read_sensor_csv, read_usbl_csv, utm_transformer, write_export_table
+)
+from kernels import minmax_pyramid, pyramid_view
+
+# Minimum delay between location highlight updates while dragging a region
+REGION_UPDATE_INTERVAL_MS = 40
+
 
 class DualDataViewer(QtWidgets.QMainWindow):
     def __init__(self):
@@ -31,10 +40,29 @@ class DualDataViewer(QtWidgets.QMainWindow):
         self.sensor_df = None
         self.utm_transformer = None
         self.utm_zone = None
+        self._usbl_times_ns = None  # Sorted int64 ns since epoch, for region lookups
+        self._usbl_east = None  # Easting/northing of the sorted rows as plain arrays
+        self._usbl_north = None
+        self._sensor_times_ns = None  # Sorted int64 ns since epoch, for region tagging
+        self._sensor_time_s = None  # Sensor x-axis: float seconds since epoch
+        self._sensor_y32 = {}  # Sensor column name -> float32 values for plotting
+        self._pyramids = {}  # Sensor column name -> min/max pyramid, built on first plot
+        self._pyramid = None  # Min/max pyramid of the plotted column
+        
+        # Background file load in progress (see _start_load)
+        self._load_thread = None
+        self._load_worker = None
         
         # Current selection
         self.selected_regions = []  # List of {name, start_time, end_time}
         
+        # Coalesce region drags: sigRegionChanged fires on every mouse move,
+        # so only the latest position is processed once the timer expires
+        self._region_timer = QtCore.QTimer(self)
+        self._region_timer.setSingleShot(True)
+        self._region_timer.setInterval(REGION_UPDATE_INTERVAL_MS)
+        self._region_timer.timeout.connect(self.on_region_changed)
+        
         self.init_ui()
         
     def init_ui(self):
@@ -73,9 +101,9 @@ class DualDataViewer(QtWidgets.QMainWindow):
         layout = QtWidgets.QHBoxLayout(panel)
         
         # USBL file loading
-        usbl_btn = QtWidgets.QPushButton("Load USBL Data")
-        usbl_btn.clicked.connect(self.load_usbl_data)
-        layout.addWidget(usbl_btn)
+        self.usbl_btn = QtWidgets.QPushButton("Load USBL Data")
+        self.usbl_btn.clicked.connect(self.load_usbl_data)
+        layout.addWidget(self.usbl_btn)
         
         self.usbl_label = QtWidgets.QLabel("No USBL data")
         self.usbl_label.setStyleSheet("color: gray;")
@@ -84,9 +112,9 @@ class DualDataViewer(QtWidgets.QMainWindow):
         layout.addSpacing(20)
         
         # Sensor file loading
-        sensor_btn = QtWidgets.QPushButton("Load Sensor Data")
-        sensor_btn.clicked.connect(self.load_sensor_data)
-        layout.addWidget(sensor_btn)
+        self.sensor_btn = QtWidgets.QPushButton("Load Sensor Data")
+        self.sensor_btn.clicked.connect(self.load_sensor_data)
+        layout.addWidget(self.sensor_btn)
         
         self.sensor_label = QtWidgets.QLabel("No sensor data")
         self.sensor_label.setStyleSheet("color: gray;")
@@ -100,6 +128,15 @@ class DualDataViewer(QtWidgets.QMainWindow):
         self.save_region_btn.setEnabled(False)
         layout.addWidget(self.save_region_btn)
         
+        # Export format: Parquet is much faster to write and smaller on disk
+        self.export_format_selector = QtWidgets.QComboBox()
+        self.export_format_selector.addItems(["Parquet", "CSV"])
+        self.export_format_selector.setToolTip(
+            "Parquet is a compressed binary format: much faster to write/read and smaller on disk.\n"
+            "Choose CSV for files that need to open in a spreadsheet."
+        )
+        layout.addWidget(self.export_format_selector)
+        
         export_btn = QtWidgets.QPushButton("Export Data")
         export_btn.clicked.connect(self.export_data)
         layout.addWidget(export_btn)
@@ -116,7 +153,7 @@ class DualDataViewer(QtWidgets.QMainWindow):
         label.setStyleSheet("font-weight: bold;")
         layout.addWidget(label)
         
-        # PyQtGraph plot widget with OpenGL
+        # PyQtGraph plot widget (raster painting, not OpenGL)
         self.location_plot = pg.PlotWidget()
         self.location_plot.setBackground('w')
         self.location_plot.showGrid(x=True, y=True, alpha=0.3)
@@ -126,19 +163,29 @@ class DualDataViewer(QtWidgets.QMainWindow):
         
         layout.addWidget(self.location_plot)
         
+        # Shared pens/brushes, reused on every setData so pyqtgraph's
+        # symbol cache keeps hitting instead of styling each point
+        self._loc_pen = pg.mkPen(None)
+        self._loc_brush = pg.mkBrush(0, 100, 200, 120)
+        self._sel_pen = pg.mkPen('r', width=2)
+        self._sel_brush = pg.mkBrush(255, 0, 0, 180)
+        
         # Scatter plot items
         self.location_scatter = pg.ScatterPlotItem(
             size=6, 
-            pen=pg.mkPen(None), 
-            brush=pg.mkBrush(0, 100, 200, 120)
+            pen=self._loc_pen, 
+            brush=self._loc_brush
         )
+        # Cache the rendered points so selection/overlay repaints are a blit
+        # (Qt re-renders the cache itself on zoom and when setData updates it)
+        self.location_scatter.setCacheMode(QtWidgets.QGraphicsItem.CacheMode.DeviceCoordinateCache)
         self.location_plot.addItem(self.location_scatter)
         
         # Highlighted selection scatter
         self.location_selection_scatter = pg.ScatterPlotItem(
             size=8,
-            pen=pg.mkPen('r', width=2),
-            brush=pg.mkBrush(255, 0, 0, 180)
+            pen=self._sel_pen,
+            brush=self._sel_brush
         )
         self.location_plot.addItem(self.location_selection_scatter)
         
@@ -164,15 +211,15 @@ class DualDataViewer(QtWidgets.QMainWindow):
         header.addStretch()
         layout.addLayout(header)
         
-        # PyQtGraph plot widget with OpenGL for performance
+        # PyQtGraph plot widget (raster painting; the curve is drawn from the min/max pyramid)
         self.timeseries_plot = pg.PlotWidget()
         self.timeseries_plot.setBackground('w')
         self.timeseries_plot.showGrid(x=True, y=True, alpha=0.3)
         self.timeseries_plot.setLabel('bottom', 'Time')
         
-        # Enable OpenGL for better performance with large datasets
-        self.timeseries_plot.setClipToView(True)
-        self.timeseries_plot.setDownsampling(auto=True, mode='peak')
+        # Downsampling comes from a precomputed min/max pyramid (see
+        # _render_curve), re-picked whenever the visible x-range changes
+        self.timeseries_plot.getViewBox().sigXRangeChanged.connect(self._render_curve)
         
         layout.addWidget(self.timeseries_plot)
         
@@ -188,7 +235,8 @@ class DualDataViewer(QtWidgets.QMainWindow):
             movable=True
         )
         self.region.setZValue(10)
-        self.region.sigRegionChanged.connect(self.on_region_changed)
+        self.region.sigRegionChanged.connect(self._schedule_region_update)
+        self.region.sigRegionChangeFinished.connect(self._flush_region_update)
         self.timeseries_plot.addItem(self.region)
         self.region.setVisible(False)  # Hidden until data is loaded
         
@@ -203,16 +251,31 @@ class DualDataViewer(QtWidgets.QMainWindow):
         if not filename:
             return
             
+        # Read and parse off the GUI thread; _on_usbl_loaded finishes the load
+        self._start_load(read_usbl_csv, filename, "USBL", self._on_usbl_loaded)
+        
+    def _on_usbl_loaded(self, usbl_df):
+        """Convert, sort and plot freshly read USBL data"""
+        self._end_load()
         try:
-            # Load data
-            self.usbl_df = pd.read_csv(filename)
-            
-            # Parse datetime with mixed format support
-            self.usbl_df['datetime'] = pd.to_datetime(self.usbl_df['datetime'], format='mixed', utc=True)
+            self.usbl_df = usbl_df
             
             # Convert lat/lon to UTM
             self.convert_to_utm()
             
+            # Sort by time once so region lookups are a binary search. NaT views
+            # as INT64_MIN, so it goes first to keep the int64 times sorted
+            self.usbl_df = self.usbl_df.sort_values(
+                'datetime', kind='stable', na_position='first'
+            ).reset_index(drop=True)
+            self._usbl_times_ns = (
+                self.usbl_df['datetime'].dt.tz_convert(None).to_numpy('datetime64[ns]').view(np.int64)
+            )
+            
+            # Coordinates as contiguous arrays, sliced directly on every region drag
+            self._usbl_east = self.usbl_df['easting'].to_numpy(dtype=np.float64)
+            self._usbl_north = self.usbl_df['northing'].to_numpy(dtype=np.float64)
+            
             # Update UI
             self.usbl_label.setText(f"✓ {len(self.usbl_df)} USBL points")
             self.usbl_label.setStyleSheet("color: green;")
@@ -234,25 +297,41 @@ class DualDataViewer(QtWidgets.QMainWindow):
         if not filename:
             return
             
+        # Read and parse off the GUI thread; _on_sensor_loaded finishes the load
+        self._start_load(read_sensor_csv, filename, "sensor", self._on_sensor_loaded)
+        
+    def _on_sensor_loaded(self, sensor_df):
+        """Sort, cache and plot freshly read sensor data"""
+        self._end_load()
         try:
-            # Load data, skipping comment lines
-            with open(filename, 'r') as f:
-                lines = f.readlines()
-                # Find where actual data starts (after # comments)
-                data_start = 0
-                for i, line in enumerate(lines):
-                    if not line.startswith('#'):
-                        data_start = i
-                        break
-            
-            self.sensor_df = pd.read_csv(filename, skiprows=data_start)
+            self.sensor_df = sensor_df
+            
+            # Sort by time once so plotting and region tagging can binary-search
+            # (NaT rows first: they view as INT64_MIN)
+            if not self.sensor_df['datetime'].is_monotonic_increasing:
+                self.sensor_df = self.sensor_df.sort_values(
+                    'datetime', kind='stable', na_position='first'
+                ).reset_index(drop=True)
+            self._sensor_times_ns = (
+                self.sensor_df['datetime'].dt.tz_convert(None).to_numpy('datetime64[ns]').view(np.int64)
+            )
             
-            # Parse datetime and make timezone-aware to match USBL data
-            self.sensor_df['datetime'] = pd.to_datetime(self.sensor_df['datetime'], utc=True)
+            # x-axis values for every column, converted once per load; the
+            # leading NaT rows have no time to plot at and are left out
+            n_nat = int(self.sensor_df['datetime'].isna().sum())
+            self._sensor_time_s = self._sensor_times_ns[n_nat:] / 1e9
             
             # Update column selector (exclude datetime)
             numeric_columns = [col for col in self.sensor_df.columns 
                              if col != 'datetime' and pd.api.types.is_numeric_dtype(self.sensor_df[col])]
+            
+            # float32 copies for plotting: plenty of precision on screen and half
+            # the data to downsample and draw (sensor_df keeps full precision for export)
+            self._sensor_y32 = {
+                col: self.sensor_df[col].to_numpy(dtype=np.float32, na_value=np.nan)[n_nat:]
+                for col in numeric_columns
+            }
+            self._pyramids = {}
             self.column_selector.clear()
             self.column_selector.addItems(numeric_columns)
             
@@ -272,6 +351,39 @@ class DualDataViewer(QtWidgets.QMainWindow):
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Error", f"Failed to load sensor data:\n{str(e)}")
             
+    def _start_load(self, read, filename, kind, on_loaded):
+        """Run read(filename) on a background thread, then on_loaded(df) here"""
+        self.usbl_btn.setEnabled(False)
+        self.sensor_btn.setEnabled(False)
+        self._load_kind = kind
+        self.statusBar().showMessage(f"Loading {kind} data...")
+        
+        # Keep references so neither object is collected while running
+        self._load_thread = QtCore.QThread(self)
+        self._load_worker = LoadWorker(read, filename)
+        self._load_worker.moveToThread(self._load_thread)
+        
+        # on_loaded is a method of this window, so it runs on the GUI thread
+        self._load_thread.started.connect(self._load_worker.run)
+        self._load_worker.loaded.connect(on_loaded)
+        self._load_worker.failed.connect(self._on_load_failed)
+        self._load_worker.loaded.connect(self._load_thread.quit)
+        self._load_worker.failed.connect(self._load_thread.quit)
+        self._load_thread.finished.connect(self._load_worker.deleteLater)
+        self._load_thread.finished.connect(self._load_thread.deleteLater)
+        self._load_thread.start()
+        
+    def _end_load(self):
+        """Re-enable loading once the background read is done"""
+        self._load_thread = None
+        self._load_worker = None
+        self.usbl_btn.setEnabled(True)
+        self.sensor_btn.setEnabled(True)
+        
+    def _on_load_failed(self, message):
+        self._end_load()
+        QtWidgets.QMessageBox.critical(self, "Error", f"Failed to load {self._load_kind} data:\n{message}")
+        
     def convert_to_utm(self):
         """Convert lat/lon to UTM coordinates"""
         if self.usbl_df is None:
@@ -285,22 +397,18 @@ class DualDataViewer(QtWidgets.QMainWindow):
         utm_zone = int((lon + 180) / 6) + 1
         hemisphere = 'north' if lat >= 0 else 'south'
         
-        # Create transformer
+        # Create transformer (cached per zone)
         self.utm_zone = utm_zone
-        self.utm_transformer = Transformer.from_crs(
-            "EPSG:4326",  # WGS84
-            f"EPSG:326{utm_zone:02d}" if hemisphere == 'north' else f"EPSG:327{utm_zone:02d}",
-            always_xy=True
-        )
+        self.utm_transformer = utm_transformer(utm_zone, hemisphere)
         
-        # Transform coordinates
-        easting, northing = self.utm_transformer.transform(
-            self.usbl_df['longitude_deg'].values,
-            self.usbl_df['latitude_deg'].values
-        )
+        # Transform coordinates in one batched call: PROJ works in place on a
+        # contiguous float64 (2, n) buffer instead of allocating new outputs
+        coords = np.empty((2, len(self.usbl_df)), dtype=np.float64)
+        coords[0] = self.usbl_df['longitude_deg'].to_numpy(dtype=np.float64)
+        coords[1] = self.usbl_df['latitude_deg'].to_numpy(dtype=np.float64)
+        self.utm_transformer.transform(coords[0], coords[1], inplace=True)
         
-        self.usbl_df['easting'] = easting
-        self.usbl_df['northing'] = northing
+        self.usbl_df = self.usbl_df.assign(easting=coords[0], northing=coords[1])
         
         print(f"Converted to UTM Zone {utm_zone}{hemisphere[0].upper()}")
         
@@ -309,13 +417,14 @@ class DualDataViewer(QtWidgets.QMainWindow):
         if self.usbl_df is None:
             return
             
-        # Plot all points
-        spots = [{
-            'pos': (row['easting'], row['northing']),
-            'data': i
-        } for i, row in self.usbl_df.iterrows()]
-        
-        self.location_scatter.setData(spots=spots)
+        # Plot all points straight from the column arrays (no per-point dicts)
+        self.location_scatter.setData(
+            x=self._usbl_east,
+            y=self._usbl_north,
+            data=np.arange(len(self._usbl_east)),
+            pen=self._loc_pen,
+            brush=self._loc_brush
+        )
         
         # Auto-range to fit data
         self.location_plot.autoRange()
@@ -329,11 +438,15 @@ class DualDataViewer(QtWidgets.QMainWindow):
         if not column:
             return
             
-        # Convert datetime to timestamp (seconds since epoch) for x-axis
-        time_values = self.sensor_df['datetime'].astype(np.int64) / 1e9  # Convert to seconds
-        y_values = self.sensor_df[column].values
+        # Seconds since epoch for the x-axis (cached at load)
+        time_values = self._sensor_time_s
+        y_values = self._sensor_y32[column]
         
-        self.timeseries_curve.setData(time_values, y_values)
+        # The data is static, so each column's pyramid is built only once
+        if column not in self._pyramids:
+            self._pyramids[column] = minmax_pyramid(time_values, y_values)
+        self._pyramid = self._pyramids[column]
+        self._render_curve()
         
         # Update axis labels
         self.timeseries_plot.setLabel('left', column)
@@ -352,6 +465,29 @@ class DualDataViewer(QtWidgets.QMainWindow):
         # Trigger initial region update
         self.on_region_changed()
         
+    def _render_curve(self):
+        """Draw the visible x-range from the pyramid level matching the plot width"""
+        if self._pyramid is None:
+            return
+        viewbox = self.timeseries_plot.getViewBox()
+        t = self._pyramid[0][0]
+        if viewbox.autoRangeEnabled()[0]:
+            x_min, x_max = t[0], t[-1]
+        else:
+            x_min, x_max = viewbox.viewRange()[0]
+        width_px = max(int(viewbox.width()), 500)
+        self.timeseries_curve.setData(*pyramid_view(self._pyramid, x_min, x_max, width_px))
+        
+    def _schedule_region_update(self):
+        """Queue a region update; a running timer already covers this move"""
+        if not self._region_timer.isActive():
+            self._region_timer.start()
+            
+    def _flush_region_update(self):
+        """Run any pending region update now instead of waiting for the timer"""
+        self._region_timer.stop()
+        self.on_region_changed()
+        
     def on_region_changed(self):
         """Handle region selection change - update location plot"""
         if self.sensor_df is None or self.usbl_df is None:
@@ -360,28 +496,27 @@ class DualDataViewer(QtWidgets.QMainWindow):
         # Get region bounds (in seconds since epoch)
         min_time, max_time = self.region.getRegion()
         
-        # Convert back to datetime
-        min_dt = pd.Timestamp(min_time, unit='s')
-        max_dt = pd.Timestamp(max_time, unit='s')
-        
-        # Filter USBL data by time range
-        mask = (self.usbl_df['datetime'] >= min_dt) & (self.usbl_df['datetime'] <= max_dt)
-        selected_usbl = self.usbl_df[mask]
-        
-        # Update highlighted scatter plot
-        if len(selected_usbl) > 0:
-            spots = [{
-                'pos': (row['easting'], row['northing']),
-                'data': i
-            } for i, row in selected_usbl.iterrows()]
-            self.location_selection_scatter.setData(spots=spots)
+        # USBL rows in the time range: a contiguous slice of the sorted data
+        lo = np.searchsorted(self._usbl_times_ns, int(min_time * 1e9), side='left')
+        hi = np.searchsorted(self._usbl_times_ns, int(max_time * 1e9), side='right')
+        
+        # Update highlighted scatter plot (rows are positions after the load-time sort)
+        if hi > lo:
+            self.location_selection_scatter.setData(
+                x=self._usbl_east[lo:hi],
+                y=self._usbl_north[lo:hi],
+                data=np.arange(lo, hi),
+                pen=self._sel_pen,
+                brush=self._sel_brush
+            )
         else:
             self.location_selection_scatter.setData([])
             
         # Update status
         self.statusBar().showMessage(
-            f"Selected: {len(selected_usbl)} USBL points | "
-            f"Time range: {min_dt.strftime('%H:%M:%S')} - {max_dt.strftime('%H:%M:%S')}"
+            f"Selected: {hi - lo} USBL points | "
+            f"Time range: {time.strftime('%H:%M:%S', time.gmtime(min_time))} - "
+            f"{time.strftime('%H:%M:%S', time.gmtime(max_time))}"
         )
         
     def save_current_region(self):
@@ -429,13 +564,16 @@ class DualDataViewer(QtWidgets.QMainWindow):
             # Tag data with regions
             self.tag_data_with_regions()
             
-            # Export USBL data as CSV
-            usbl_output = f"{directory}/usbl_tagged.csv"
-            self.usbl_df.to_csv(usbl_output, index=False)
+            export_format = self.export_format_selector.currentText()
+            ext = '.parquet' if export_format == "Parquet" else '.csv'
             
-            # Export sensor data as CSV
-            sensor_output = f"{directory}/sensor_tagged.csv"
-            self.sensor_df.to_csv(sensor_output, index=False)
+            # Export USBL data
+            usbl_output = f"{directory}/usbl_tagged{ext}"
+            self._write_tagged(self.usbl_df, usbl_output, export_format)
+            
+            # Export sensor data
+            sensor_output = f"{directory}/sensor_tagged{ext}"
+            self._write_tagged(self.sensor_df, sensor_output, export_format)
             
             QtWidgets.QMessageBox.information(
                 self, "Export Complete",
@@ -446,23 +584,55 @@ class DualDataViewer(QtWidgets.QMainWindow):
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Export Error", str(e))
             
+    def _write_tagged(self, df, path, export_format):
+        """Write one tagged frame as Parquet or CSV"""
+        if export_format == "Parquet":
+            write_export_table(pa.Table.from_pandas(df, preserve_index=False), path, export_format)
+        else:
+            # pandas' writer keeps this viewer's CSV format: True/False region
+            # flags and pandas datetime text (the shared writer uses 1/0 and
+            # Arrow's timestamp format)
+            df.to_csv(path, index=False)
+            
     def tag_data_with_regions(self):
         """Add region tags as columns to dataframes"""
-        # Add a column for each saved region
+        # Tag USBL data
+        if self.usbl_df is not None:
+            self.usbl_df = self._with_region_columns(self.usbl_df, self._usbl_times_ns)
+            
+        # Tag sensor data
+        if self.sensor_df is not None:
+            self.sensor_df = self._with_region_columns(self.sensor_df, self._sensor_times_ns)
+            
+    def _with_region_columns(self, df, times_ns):
+        """df with a boolean column per saved region name, added in one concat"""
+        # Regions saved under the same name share a column
+        columns = {}
         for region in self.selected_regions:
             col_name = f"region_{region['name']}"
-            
-            # Tag USBL data
-            if self.usbl_df is not None:
-                mask = (self.usbl_df['datetime'] >= region['start_time']) & \
-                       (self.usbl_df['datetime'] <= region['end_time'])
-                self.usbl_df[col_name] = mask
-                
-            # Tag sensor data
-            if self.sensor_df is not None:
-                mask = (self.sensor_df['datetime'] >= region['start_time']) & \
-                       (self.sensor_df['datetime'] <= region['end_time'])
-                self.sensor_df[col_name] = mask
+            mask = self._region_mask(times_ns, region)
+            columns[col_name] = columns[col_name] | mask if col_name in columns else mask
+            
+        # Inserting columns one at a time fragments the frame (a block per
+        # column); replace any tags from a previous export in a single concat
+        tags = pd.DataFrame(columns, index=df.index)
+        return pd.concat([df.drop(columns=list(columns), errors='ignore'), tags], axis=1)
+        
+    def _region_mask(self, times_ns, region):
+        """Boolean mask of the sorted times_ns inside a saved region (inclusive)"""
+        # Region bounds are naive UTC Timestamps: .value is ns since epoch
+        lo = np.searchsorted(times_ns, region['start_time'].value, side='left')
+        hi = np.searchsorted(times_ns, region['end_time'].value, side='right')
+        mask = np.zeros(len(times_ns), dtype=bool)
+        mask[lo:hi] = True
+        return mask
+
+    def closeEvent(self, event):
+        """Wait out a load in progress so its thread is not destroyed while running"""
+        if self._load_thread is not None:
+            self._load_thread.quit()
+            self._load_thread.wait()
+        super().closeEvent(event)
 
 
 def main():
@@ -0,0 +1,163 @@
+"""
+Numeric kernels for the plotting hot paths
+
+Plain NumPy implementations are always available. When numba is installed,
+the loop-heavy LTTB selection is JIT-compiled (cached on disk, so only the
+first run pays the compile).
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def downsample_lttb(t, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling of (t, y) to n_out points
+
+    Keeps the first and last points; from each bucket in between keeps the point
+    forming the largest triangle with the previously kept point and the next
+    bucket's mean, which preserves peaks far better than decimation.
+    """
+    n = len(t)
+    if n_out >= n or n_out < 3:
+        return t, y
+
+    # Bucket i covers interior points [edges[i], edges[i + 1])
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = _lttb_keep(t, y, edges)
+    return t[keep], y[keep]
+
+
+def _lttb_keep_numpy(t, y, edges):
+    """Indices kept by LTTB; one Python iteration per bucket"""
+    n = len(t)
+    n_out = len(edges) + 1
+    counts = np.diff(edges)
+    mean_t = np.add.reduceat(t[:-1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    # Third triangle vertex: the next bucket's mean, or the last point
+    next_t = np.append(mean_t[1:], t[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = a = 0
+    keep[-1] = n - 1
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (t[a] - next_t[i]) * (y[lo:hi] - y[a]) -
+            (t[a] - t[lo:hi]) * (next_y[i] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _lttb_keep_numba(t, y, edges):
+        """Indices kept by LTTB; single fused compiled loop"""
+        n = t.shape[0]
+        n_out = edges.shape[0] + 1
+        keep = np.empty(n_out, dtype=np.int64)
+        keep[0] = 0
+        keep[n_out - 1] = n - 1
+        a = 0
+        for i in range(n_out - 2):
+            lo = edges[i]
+            hi = edges[i + 1]
+
+            # Next bucket's mean (the last point for the final bucket)
+            if i + 2 < n_out - 1:
+                nhi = edges[i + 2]
+                sum_t = 0.0
+                sum_y = 0.0
+                for j in range(hi, nhi):
+                    sum_t += t[j]
+                    sum_y += y[j]
+                next_t = sum_t / (nhi - hi)
+                next_y = sum_y / (nhi - hi)
+            else:
+                next_t = t[n - 1]
+                next_y = y[n - 1]
+
+            best = -1.0
+            best_j = lo
+            for j in range(lo, hi):
+                area = abs((t[a] - next_t) * (y[j] - y[a]) - (t[a] - t[j]) * (next_y - y[a]))
+                if area > best:
+                    best = area
+                    best_j = j
+            a = best_j
+            keep[i + 1] = a
+        return keep
+
+    _lttb_keep = _lttb_keep_numba
+else:
+    _lttb_keep = _lttb_keep_numpy
+
+
+def first_per_cell(x, y, dx, dy):
+    """Sorted indices of the first point in each occupied dx-by-dy grid cell
+    
+    Points with a non-finite coordinate are left out (they cannot be drawn,
+    and one NaN would otherwise make the grid origin NaN).
+    """
+    finite = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    if len(finite) == 0:
+        return finite
+    x = x[finite]
+    y = y[finite]
+    bx = ((x - x.min()) // dx).astype(np.int64)
+    by = ((y - y.min()) // dy).astype(np.int64)
+    _, first = np.unique(bx * (by.max() + 1) + by, return_index=True)
+    first.sort()
+    return finite[first]
+
+
+def minmax_pyramid(t, y, min_buckets=1024):
+    """Min/max pyramid of (t, y) for drawing at any zoom level
+
+    Returns a list of (t, y_min, y_max) levels. Level 0 is the raw data; each
+    further level halves the one below, keeping every bucket's start time and
+    its min and max (NaNs ignored), until fewer than 2 * min_buckets remain.
+    """
+    levels = [(t, y, y)]
+    while len(levels[-1][0]) >= 2 * min_buckets:
+        t_k, lo, hi = levels[-1]
+        n = len(t_k) // 2 * 2
+        # An odd last bucket is carried up unpaired so the tail is never dropped
+        levels.append((
+            np.append(t_k[0:n:2], t_k[n:]),
+            np.append(np.fmin(lo[0:n:2], lo[1:n:2]), lo[n:]),
+            np.append(np.fmax(hi[0:n:2], hi[1:n:2]), hi[n:]),
+        ))
+    return levels
+
+
+def pyramid_view(levels, x0, x1, max_buckets):
+    """(x, y) to draw for [x0, x1] from the finest level with <= max_buckets in view
+
+    Above level 0 each bucket is drawn as a vertical min-max segment, like
+    pyqtgraph's 'peak' downsampling, so spikes are never lost.
+    """
+    t0 = levels[0][0]
+    visible = np.searchsorted(t0, x1, side='right') - np.searchsorted(t0, x0, side='left')
+    k = 0
+    while k + 1 < len(levels) and visible >> k > max_buckets:
+        k += 1
+
+    # One bucket of margin either side so the line runs to the plot edges
+    t, y_min, y_max = levels[k]
+    lo = max(np.searchsorted(t, x0, side='left') - 1, 0)
+    hi = min(np.searchsorted(t, x1, side='right') + 1, len(t))
+    if k == 0:
+        return t[lo:hi], y_min[lo:hi]
+    y = np.empty(2 * (hi - lo), dtype=y_min.dtype)
+    y[0::2] = y_min[lo:hi]
+    y[1::2] = y_max[lo:hi]
+    return np.repeat(t[lo:hi], 2), y
@@ -55,10 +55,10 @@ def test_usbl_data(filepath):
     
     # Beacons
     if 'beacon_name' in df.columns:
-        beacons = df['beacon_name'].unique()
-        print(f"\n✓ Beacons found: {len(beacons)}")
-        for beacon in beacons:
-            count = (df['beacon_name'] == beacon).sum()
+        # One counting pass for all beacons (in order of first appearance)
+        counts = df['beacon_name'].value_counts(sort=False, dropna=False)
+        print(f"\n✓ Beacons found: {len(counts)}")
+        for beacon, count in counts.items():
             print(f"  - {beacon}: {count} points")
     
     return df
@@ -70,14 +70,9 @@ def test_sensor_data(filepath):
     print("TESTING SENSOR DATA")
     print("=" * 60)
     
-    # Find data start (skip comments)
+    # Find data start (skip comments), reading only as far as the header
     with open(filepath, 'r') as f:
-        lines = f.readlines()
-        data_start = 0
-        for i, line in enumerate(lines):
-            if not line.startswith('#'):
-                data_start = i
-                break
+        data_start = next((i for i, line in enumerate(f) if not line.startswith('#')), 0)
     
     print(f"\n✓ Skipped {data_start} comment lines")
     
@@ -93,8 +88,9 @@ def test_sensor_data(filepath):
     print(f"  Duration: {df['datetime'].max() - df['datetime'].min()}")
     
     # Calculate sampling rate
-    time_diffs = df['datetime'].diff().dt.total_seconds()
-    median_dt = time_diffs.median()
+    # Differences of the int64 ns ticks, without building Timedeltas
+    ts_ns = df['datetime'].dropna().array.as_unit('ns').asi8
+    median_dt = np.median(np.diff(ts_ns)) / 1e9 if len(ts_ns) > 1 else 0
     freq = 1 / median_dt if median_dt > 0 else 0
     print(f"  Median sampling rate: {freq:.1f} Hz")
     